@@ -1,12 +1,17 @@
 # app_flask.py — same logic, prettier templates
-from flask import Flask, request, render_template_string, redirect, url_for, abort
+from flask import Flask, request, render_template_string, redirect, url_for, abort, jsonify
 from PIL import Image, UnidentifiedImageError
 import numpy as np
-import tensorflow as tf
 import io
 import base64
+import hmac
 import logging
 import os
+import threading
+import time
+
+from cascade import load_cascade
+from model_registry import REGISTRY_DIR, ModelRegistry
 
 # Basic logging
 logging.basicConfig(level=logging.INFO)
@@ -14,22 +19,56 @@ logger = logging.getLogger(__name__)
 
 # Config
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "fruits_cnn.h5")
+# Preferred over MODEL_PATH when present (see export_savedmodel.py): no Keras rebuild, no retracing.
+SAVEDMODEL_PATH = os.path.join(os.path.dirname(__file__), "fruits_cnn_savedmodel")
+# "background": serve / and health endpoints at once, load models in a thread. "eager": load before serving.
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "background")
+WARMUP_BATCH_SIZES = [int(b) for b in os.environ.get("WARMUP_BATCH_SIZES", "1,8,32").split(",") if b]
 ALLOWED_EXT = {"png", "jpg", "jpeg"}
 MAX_CONTENT_LENGTH = 2 * 1024 * 1024  # 2 MB upload limit
 
 app = Flask(__name__)
 app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
 
-# Load model once (TF2). Wrap in try/except to show a clear error if model missing.
-try:
-    model = tf.keras.models.load_model(MODEL_PATH)
-    logger.info("Model loaded from %s", MODEL_PATH)
-except Exception as e:
-    logger.exception("Failed to load model: %s", e)
-    model = None
-
 classes = ["apple", "banana", "orange"]
 
+# Versioned models live in REGISTRY_DIR; the SavedModel export or MODEL_PATH is used when the registry is empty.
+# New versions are loaded, warmed up and swapped in by a background watcher (see model_registry.py).
+registry = ModelRegistry(
+    os.environ.get("MODEL_REGISTRY_DIR", REGISTRY_DIR),
+    fallback_path=SAVEDMODEL_PATH if os.path.isdir(SAVEDMODEL_PATH) else MODEL_PATH,
+    n_classes=len(classes),
+    candidate_fraction=float(os.environ.get("CANDIDATE_TRAFFIC", "0")),
+    candidate_mode=os.environ.get("CANDIDATE_MODE", "shadow"),
+    poll_interval=float(os.environ.get("REGISTRY_POLL_SECONDS", "5")),
+    warmup_batch_sizes=WARMUP_BATCH_SIZES,
+)
+
+# Optional cheap first stage (cascade.json / CASCADE_MODEL_PATH). None means full model only.
+cascade = None
+
+# Startup state reported by /readyz. TensorFlow itself is only imported by load_models().
+startup = {"mode": STARTUP_MODE, "started_at": time.time(), "ready_at": None, "error": None}
+
+def load_models():
+    global cascade
+    try:
+        registry.load_initial()
+        cascade = load_cascade(warmup_batch_sizes=WARMUP_BATCH_SIZES)
+        if registry.active is None:
+            startup["error"] = "No model available."
+    except Exception as e:
+        logger.exception("Failed to load model: %s", e)
+        startup["error"] = str(e)
+    startup["ready_at"] = time.time()
+    logger.info("Startup finished in %.2fs", startup["ready_at"] - startup["started_at"])
+    registry.start_watcher()
+
+if STARTUP_MODE == "eager":
+    load_models()
+else:
+    threading.Thread(target=load_models, name="model-loader", daemon=True).start()
+
 # ---------- PRETTY TEMPLATES (Bootstrap 5) ----------
 INDEX_HTML = """
 <!doctype html>
@@ -138,6 +177,9 @@ RESULT_HTML = """
                   <span class="badge bg-success label-pill">{{ label|capitalize }}</span>
                   <span class="ms-2 text-muted">Confidence: <strong>{{ confidence }}%</strong></span>
                 </div>
+                {% if stage %}
+                  <div class="mb-3 small text-muted">Answered by the {{ "fast first-stage" if stage == "first" else "full" }} model</div>
+                {% endif %}
 
                 <h6 class="mb-2">Class probabilities</h6>
                 <div class="d-flex flex-column">
@@ -165,7 +207,7 @@ RESULT_HTML = """
         </div>
 
         <div class="text-center mt-3 small text-muted">
-          Note: results are returned by a local TensorFlow model.
+          Note: results are returned by a local TensorFlow model{% if model_version %} (version {{ model_version }}){% endif %}.
         </div>
       </div>
     </div>
@@ -195,7 +237,12 @@ def index():
 
 @app.route("/predict", methods=["POST"])
 def predict():
-    if model is None:
+    # Hold on to the versions picked for this request: a concurrent hot-swap does not affect it.
+    client_key = request.headers.get("X-Forwarded-For", request.remote_addr or "")
+    served, shadow, served_is_candidate = registry.route(client_key)
+    if served is None:
+        if startup["ready_at"] is None:
+            return render_template_string(RESULT_HTML, error="The model is still loading, try again in a few seconds."), 503
         return render_template_string(RESULT_HTML, error="Model failed to load. Check server logs."), 500
 
     if "file" not in request.files:
@@ -218,12 +265,24 @@ def predict():
         logger.exception("Error while preprocessing image")
         return render_template_string(RESULT_HTML, error="Error processing image."), 500
 
+    stage = None
     try:
-        preds = model.predict(img_array)
+        start = time.perf_counter()
+        # Requests in the candidate slice bypass the cascade: the comparison must be served model
+        # vs shadow model, and in canary mode the candidate has to actually answer.
+        if cascade is not None and shadow is None:
+            preds, stages = cascade.predict(img_array, served.predict)
+            stage = stages[0]
+        else:
+            preds = served.predict(img_array)
+        served_seconds = time.perf_counter() - start
     except Exception:
         logger.exception("Error during model prediction")
         return render_template_string(RESULT_HTML, error="Model prediction failed."), 500
 
+    if shadow is not None:
+        registry.submit_comparison(img_array, preds, served_is_candidate, shadow, served_seconds)
+
     # safe handling of preds shape
     preds = np.asarray(preds)
     if preds.ndim == 2 and preds.shape[0] == 1:
@@ -238,7 +297,58 @@ def predict():
     img_b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
 
     return render_template_string(RESULT_HTML, label=label, confidence=f"{confidence:.2f}",
-                                  img_b64=img_b64, probabilities=probabilities, filename=getattr(request.files['file'], 'filename', 'image'))
+                                  img_b64=img_b64, probabilities=probabilities, stage=stage,
+                                  model_version=served.version, filename=getattr(request.files['file'], 'filename', 'image'))
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    # liveness: the process answers, whatever the model state
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    ready = startup["ready_at"] is not None and registry.active is not None
+    body = {
+        "status": "ready" if ready else ("error" if startup["error"] else "loading"),
+        "mode": startup["mode"],
+        "uptime_seconds": round(time.time() - startup["started_at"], 3),
+        "time_to_ready_seconds": round(startup["ready_at"] - startup["started_at"], 3) if startup["ready_at"] else None,
+        "model_version": registry.active.version if registry.active else None,
+        "error": startup["error"],
+    }
+    return jsonify(body), 200 if ready else 503
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify({"startup": startup,
+                    "cascade": cascade.stats.as_dict() if cascade is not None else None,
+                    "cascade_threshold": cascade.threshold if cascade is not None else None,
+                    "registry": registry.metrics()})
+
+def check_admin():
+    # The admin routes need ADMIN_TOKEN and are disabled without it: behind a reverse proxy
+    # every client looks local, so remote_addr cannot be trusted.
+    token = os.environ.get("ADMIN_TOKEN")
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token):
+        abort(403)
+
+@app.route("/admin/rollback", methods=["POST"])
+def admin_rollback():
+    check_admin()
+    target = registry.rollback()
+    if target is None:
+        return jsonify({"status": "error", "error": "No previous version to roll back to."}), 409
+    return jsonify({"status": "success", "active": target.version})
+
+@app.route("/admin/promote", methods=["POST"])
+def admin_promote():
+    check_admin()
+    promoted = registry.promote_candidate()
+    if promoted is None:
+        return jsonify({"status": "error", "error": "No candidate version loaded."}), 409
+    return jsonify({"status": "success", "active": promoted.version})
 
 # Helpful error handler for large uploads
 @app.errorhandler(413)
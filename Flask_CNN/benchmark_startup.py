@@ -0,0 +1,133 @@
+# benchmark_startup.py — time-to-ready and first-request latency of app_flask.py
+#
+# Usage:
+#   python Flask_CNN/benchmark_startup.py --runs 3
+#
+# Each configuration starts a fresh server process against a temporary registry
+# holding either the .h5 model or its SavedModel export, then measures:
+#   first_response_s  process start -> GET / answers
+#   ready_s           process start -> GET /readyz answers 200
+#   first_predict_ms  latency of the first POST /predict once ready
+#   second_predict_ms latency of the next one (steady state)
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+
+from model_registry import publish
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(HERE, "fruits_cnn.h5")
+SAMPLE_DIR = os.path.join(HERE, "..", "fruits", "test", "apple")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(url: str, timeout: float = 1.0) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return 0
+
+
+def post_image(url: str, image_bytes: bytes) -> float:
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"sample.png\"\r\n"
+            f"Content-Type: image/png\r\n\r\n").encode() + image_bytes + f"\r\n--{boundary}--\r\n".encode()
+    req = urllib.request.Request(url, data=body, method="POST",
+                                 headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        resp.read()
+        if resp.status != 200:
+            raise RuntimeError(f"/predict returned {resp.status}")
+    return (time.perf_counter() - start) * 1000
+
+
+def run_once(mode: str, registry_dir: str, image_bytes: bytes, timeout: float = 120.0) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, STARTUP_MODE=mode, MODEL_REGISTRY_DIR=registry_dir, TF_CPP_MIN_LOG_LEVEL="2")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", f"import app_flask; app_flask.app.run(port={port}, threaded=True)"],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        first_response = ready = None
+        while time.perf_counter() - start < timeout:
+            if first_response is None and get(base + "/") == 200:
+                first_response = time.perf_counter() - start
+            if first_response is not None and get(base + "/readyz") == 200:
+                ready = time.perf_counter() - start
+                break
+            time.sleep(0.02)
+        if ready is None:
+            raise RuntimeError(f"server not ready after {timeout}s")
+        return {
+            "first_response_s": round(first_response, 3),
+            "ready_s": round(ready, 3),
+            "first_predict_ms": round(post_image(base + "/predict", image_bytes), 2),
+            "second_predict_ms": round(post_image(base + "/predict", image_bytes), 2),
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Flask_CNN cold start and first-request latency.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modes", nargs="*", default=["eager", "background"])
+    parser.add_argument("--out", help="optional JSON output path")
+    args = parser.parse_args()
+
+    with open(os.path.join(SAMPLE_DIR, sorted(os.listdir(SAMPLE_DIR))[0]), "rb") as f:
+        image_bytes = f.read()
+
+    work = tempfile.mkdtemp(prefix="startup-bench-")
+    try:
+        registries = {"h5": os.path.join(work, "h5")}
+        publish(MODEL_PATH, registries["h5"])
+        savedmodel = os.path.join(work, "export")
+        subprocess.run([sys.executable, os.path.join(HERE, "export_savedmodel.py"), "--out", savedmodel],
+                       check=True, cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        registries["savedmodel"] = os.path.join(work, "savedmodel")
+        publish(savedmodel, registries["savedmodel"])
+
+        results = []
+        for artifact, registry_dir in registries.items():
+            for mode in args.modes:
+                runs = [run_once(mode, registry_dir, image_bytes) for _ in range(args.runs)]
+                row = {"artifact": artifact, "mode": mode}
+                for key in runs[0]:
+                    row[key] = round(float(np.median([r[key] for r in runs])), 3)
+                results.append(row)
+                print(json.dumps(row))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
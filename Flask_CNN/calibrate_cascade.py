@@ -0,0 +1,101 @@
+# calibrate_cascade.py — pick the cascade threshold on fruits/validation
+#
+# Usage:
+#   python Flask_CNN/calibrate_cascade.py --first-stage tflite/compressed/pruned_50.tflite --target-accuracy 0.95
+#
+# Runs both stages over every validation image (same preprocessing as app_flask.py),
+# then picks the lowest threshold whose cascade accuracy reaches the target, i.e. the
+# one that escalates the fewest requests. The result is written to cascade.json,
+# which app_flask.py reads at startup.
+import argparse
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from cascade import CASCADE_CONFIG, load_classifier
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(HERE, "fruits_cnn.h5")
+VALIDATION_DIR = os.path.join(HERE, "..", "fruits", "validation")
+DEFAULT_FIRST_STAGE = os.path.join(HERE, "..", "tflite", "fruits_cnn.tflite")
+classes = ["apple", "banana", "orange"]
+
+
+def load_validation(data_dir: str):
+    images, labels = [], []
+    for label, name in enumerate(classes):
+        folder = os.path.join(data_dir, name)
+        for fname in sorted(os.listdir(folder)):
+            img = Image.open(os.path.join(folder, fname)).convert("RGB").resize((32, 32))
+            images.append(np.array(img).astype(np.float32))
+            labels.append(label)
+    return np.stack(images), np.array(labels)
+
+
+def sweep(first_probs: np.ndarray, full_probs: np.ndarray, labels: np.ndarray) -> list:
+    """Cascade accuracy / escalation rate for every distinct first-stage confidence."""
+    confidence = first_probs.max(axis=1)
+    first_ok = first_probs.argmax(axis=1) == labels
+    full_ok = full_probs.argmax(axis=1) == labels
+    rows = []
+    # escalate when confidence < threshold; thresholds above every confidence escalate all
+    for threshold in np.unique(np.concatenate([confidence, [1.0 + 1e-6]])):
+        escalate = confidence < threshold
+        correct = np.where(escalate, full_ok, first_ok)
+        rows.append({
+            "threshold": float(threshold),
+            "accuracy": float(correct.mean()),
+            "escalation_rate": float(escalate.mean()),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the Flask_CNN cascade threshold.")
+    parser.add_argument("--first-stage", default=DEFAULT_FIRST_STAGE, help=".tflite or .h5 first-stage model")
+    parser.add_argument("--full-model", default=MODEL_PATH)
+    parser.add_argument("--data", default=VALIDATION_DIR)
+    parser.add_argument("--target-accuracy", type=float, default=None,
+                        help="minimum cascade accuracy (default: the full model's own accuracy)")
+    parser.add_argument("--out", default=CASCADE_CONFIG)
+    args = parser.parse_args()
+
+    images, labels = load_validation(args.data)
+    first_probs = load_classifier(args.first_stage).predict(images)
+    full_probs = load_classifier(args.full_model).predict(images)
+
+    full_accuracy = float((full_probs.argmax(axis=1) == labels).mean())
+    first_accuracy = float((first_probs.argmax(axis=1) == labels).mean())
+    target = full_accuracy if args.target_accuracy is None else args.target_accuracy
+    print(f"validation images: {len(labels)}  first-stage acc: {first_accuracy:.4f}  full acc: {full_accuracy:.4f}")
+
+    rows = sweep(first_probs, full_probs, labels)
+    feasible = [r for r in rows if r["accuracy"] >= target]
+    if not feasible:
+        # even escalating everything misses the target: fall back to always using the full model
+        chosen = rows[-1]
+        print(f"target accuracy {target:.4f} is unreachable, escalating everything")
+    else:
+        chosen = min(feasible, key=lambda r: r["threshold"])
+
+    config = {
+        "first_stage": os.path.relpath(os.path.abspath(args.first_stage), os.path.dirname(os.path.abspath(args.out))),
+        "threshold": round(chosen["threshold"], 6),
+        "target_accuracy": target,
+        "validation": {
+            "images": int(len(labels)),
+            "cascade_accuracy": chosen["accuracy"],
+            "escalation_rate": chosen["escalation_rate"],
+            "first_stage_accuracy": first_accuracy,
+            "full_model_accuracy": full_accuracy,
+        },
+    }
+    with open(args.out, "w") as f:
+        json.dump(config, f, indent=2)
+    print(json.dumps(config, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# cascade.py — confidence-based two-stage classifier for app_flask.py
+#
+# A cheap first-stage model (TFLite or a pruned Keras variant, see tflite/compress.py)
+# answers every input whose max softmax probability clears `threshold`. Everything
+# else escalates to the full fruits_cnn.h5 model. Thresholds come from
+# calibrate_cascade.py, which writes cascade.json next to this file.
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CASCADE_CONFIG = os.path.join(os.path.dirname(__file__), "cascade.json")
+
+
+class TFLiteClassifier:
+    """Thin wrapper over tf.lite.Interpreter. The interpreter is not thread-safe, hence the lock."""
+
+    def __init__(self, path: str, num_threads: int = 1):
+        import tensorflow as tf
+        self.path = path
+        self._interpreter = tf.lite.Interpreter(model_path=path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._lock = threading.Lock()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.asarray(batch, dtype=self._input["dtype"])
+        with self._lock:
+            if tuple(self._input["shape"]) != batch.shape:
+                self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._input = self._interpreter.get_input_details()[0]
+            self._interpreter.set_tensor(self._input["index"], batch)
+            self._interpreter.invoke()
+            return np.array(self._interpreter.get_tensor(self._output["index"]))
+
+
+class KerasClassifier:
+    """Keras model (or SavedModel export) behind the same predict() interface as TFLiteClassifier.
+
+    Served through model_registry.load_serving_fn, the fixed-signature graph function the full
+    model uses, rather than an eager call per request.
+    """
+
+    def __init__(self, path: str):
+        from model_registry import load_serving_fn
+        self.path = path
+        self._model, self._fn = load_serving_fn(path)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self._fn(np.asarray(batch, dtype=np.float32)))
+
+
+def load_classifier(path: str):
+    if path.endswith(".tflite"):
+        return TFLiteClassifier(path)
+    return KerasClassifier(path)
+
+
+class CascadeStats:
+    """Thread-safe counters: escalation rate and per-stage latency (mean, p50, p95)."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.escalations = 0
+        self._latency = {"first": deque(maxlen=window), "full": deque(maxlen=window)}
+
+    def record_latency(self, stage: str, seconds: float):
+        with self._lock:
+            self._latency[stage].append(seconds)
+
+    def record_requests(self, samples: int, escalated: int):
+        with self._lock:
+            self.requests += samples
+            self.escalations += escalated
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            stages = {}
+            for stage, values in self._latency.items():
+                arr = np.asarray(values) * 1000
+                stages[stage] = {
+                    "calls": len(arr),
+                    "mean_ms": round(float(arr.mean()), 3) if len(arr) else None,
+                    "p50_ms": round(float(np.percentile(arr, 50)), 3) if len(arr) else None,
+                    "p95_ms": round(float(np.percentile(arr, 95)), 3) if len(arr) else None,
+                }
+            return {
+                "requests": self.requests,
+                "escalations": self.escalations,
+                "escalation_rate": round(self.escalations / self.requests, 4) if self.requests else None,
+                "latency": stages,
+            }
+
+
+class Cascade:
+    def __init__(self, first_stage, threshold: float):
+        self.first_stage = first_stage
+        self.threshold = float(threshold)
+        self.stats = CascadeStats()
+
+    def predict(self, batch: np.ndarray, full_predict):
+        """Return (probabilities [N, n_classes], stages [N]) where stage is "first" or "full".
+
+        `full_predict` is called only on the rows the first stage is unsure about.
+        """
+        start = time.perf_counter()
+        probs = np.array(self.first_stage.predict(batch), dtype=np.float32)
+        self.stats.record_latency("first", time.perf_counter() - start)
+
+        escalate = np.flatnonzero(probs.max(axis=1) < self.threshold)
+        stages = ["first"] * len(probs)
+        if len(escalate):
+            start = time.perf_counter()
+            probs[escalate] = np.asarray(full_predict(batch[escalate]))
+            self.stats.record_latency("full", time.perf_counter() - start)
+            for i in escalate:
+                stages[i] = "full"
+        self.stats.record_requests(len(probs), len(escalate))
+        return probs, stages
+
+
+def warm_up(classifier, batch_sizes=(1,)):
+    """Run zero batches through the first stage before it serves.
+
+    Largest first, so a TFLite interpreter ends up allocated for the smallest (single-image) size.
+    """
+    for size in sorted(batch_sizes, reverse=True):
+        classifier.predict(np.zeros((size, 32, 32, 3), dtype=np.float32))
+
+
+def load_cascade(config_path: str = CASCADE_CONFIG, warmup_batch_sizes=(1,)):
+    """Build the cascade from cascade.json, overridden by CASCADE_MODEL_PATH / CASCADE_THRESHOLD.
+
+    The first stage is warmed up before returning, so /readyz only reports ready once it is.
+    Returns None (cascade disabled) when no first-stage model is configured or it fails to load.
+    """
+    cfg = {}
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            cfg = json.load(f)
+    first_stage_path = os.environ.get("CASCADE_MODEL_PATH", cfg.get("first_stage"))
+    threshold = float(os.environ.get("CASCADE_THRESHOLD", cfg.get("threshold", 0.9)))
+    if not first_stage_path:
+        return None
+    if not os.path.isabs(first_stage_path):
+        first_stage_path = os.path.join(os.path.dirname(config_path), first_stage_path)
+
+    try:
+        start = time.perf_counter()
+        first_stage = load_classifier(first_stage_path)
+        warm_up(first_stage, warmup_batch_sizes)
+        cascade = Cascade(first_stage, threshold)
+        logger.info("Cascade enabled: first stage %s, threshold %.3f (load + warm-up %.2fs)",
+                    first_stage_path, threshold, time.perf_counter() - start)
+        return cascade
+    except Exception as e:
+        logger.exception("Failed to load cascade first stage, serving full model only: %s", e)
+        return None
@@ -0,0 +1,54 @@
+# export_savedmodel.py — export fruits_cnn.h5 as a fixed-signature SavedModel
+#
+# Usage:
+#   python Flask_CNN/export_savedmodel.py                      # -> Flask_CNN/fruits_cnn_savedmodel/
+#   python Flask_CNN/model_registry.py publish Flask_CNN/fruits_cnn_savedmodel
+#
+# The exported `serve` function takes float32 [None, 32, 32, 3] (raw 0-255 RGB, the
+# model rescales itself) and returns [None, 3] probabilities. It is traced once here,
+# so the server loads a ready graph instead of rebuilding and retracing the Keras model.
+import argparse
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from model_registry import INPUT_SHAPE
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(HERE, "fruits_cnn.h5")
+SAVEDMODEL_PATH = os.path.join(HERE, "fruits_cnn_savedmodel")
+
+
+class ServingModule(tf.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    @tf.function(input_signature=[tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name="images")])
+    def serve(self, images):
+        return self.model(images, training=False)
+
+
+def export(model_path: str, out_dir: str):
+    model = tf.keras.models.load_model(model_path)
+    module = ServingModule(model)
+    tf.saved_model.save(module, out_dir, signatures={"serving_default": module.serve})
+
+    # round-trip check: same outputs as the Keras model
+    x = np.random.default_rng(0).uniform(0, 255, (4,) + INPUT_SHAPE).astype(np.float32)
+    restored = tf.saved_model.load(out_dir)
+    np.testing.assert_allclose(restored.serve(x).numpy(), model(x, training=False).numpy(), atol=1e-5)
+    print(f"SavedModel written to {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the fruits CNN as a fixed-signature SavedModel.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--out", default=SAVEDMODEL_PATH)
+    args = parser.parse_args()
+    export(args.model, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+# model_registry.py — versioned model directory + zero-downtime hot-swap for app_flask.py
+#
+# Layout:
+#   registry/
+#     v0001/fruits_cnn.h5
+#     v0002/fruits_cnn.h5
+#     v0002/saved_model/      <- optional, from export_savedmodel.py; preferred over the .h5
+#
+# Publish a new version with:
+#   python Flask_CNN/model_registry.py publish path/to/new_model.h5
+# (copied to a hidden temp dir first, then renamed into place so the watcher never
+# sees a half-written version).
+#
+# A background watcher polls the registry. A new version is loaded, warmed up and
+# smoke-tested off the request path, then swapped in with a single reference
+# assignment: requests already running keep the ModelVersion they started with,
+# so nothing in flight is dropped. If CANDIDATE_TRAFFIC > 0 new versions become a
+# candidate instead, and a stable slice of clients is pinned to it for comparison.
+#
+# Rollback and promote decisions are written to the registry itself, so every worker's
+# watcher applies them and they survive restarts:
+#   registry/ACTIVE     version an operator pinned as active (promote, rollback target)
+#   registry/REJECTED   rolled-back versions, one per line; never loaded again
+# Versions published after the pinned one are new releases and go through the usual path.
+import argparse
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_DIR = os.path.join(os.path.dirname(__file__), "registry")
+MODEL_EXT = (".h5", ".keras")
+SAVED_MODEL_DIR = "saved_model"
+ACTIVE_FILE = "ACTIVE"
+REJECTED_FILE = "REJECTED"
+INPUT_SHAPE = (32, 32, 3)
+WARMUP_BATCH_SIZES = (1, 8, 32)
+
+
+def load_serving_fn(path: str):
+    """Return (model, fn) where fn is a graph function with a fixed [None, 32, 32, 3] float32 signature.
+
+    A SavedModel directory from export_savedmodel.py is loaded as-is (already traced, no Keras
+    deserialisation). A .h5/.keras file is wrapped in an equivalent tf.function. Either way the
+    batch dimension is unknown in the signature, so no batch size ever triggers a retrace.
+    """
+    import tensorflow as tf
+    if os.path.isdir(path):
+        loaded = tf.saved_model.load(path)
+        return loaded, loaded.serve
+    model = tf.keras.models.load_model(path)
+
+    @tf.function(input_signature=[tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name="images")])
+    def serve(images):
+        return model(images, training=False)
+
+    return model, serve
+
+
+def _natural_key(name: str):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class ModelVersion:
+    """One loaded, warmed-up model plus the timings it took to get there."""
+
+    def __init__(self, version: str, path: str, model, fn, load_seconds: float):
+        self.version = version
+        self.path = path
+        self.model = model
+        self._fn = fn
+        self.load_seconds = load_seconds
+        self.warmup_seconds = None
+        self.loaded_at = time.time()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self._fn(np.asarray(batch, dtype=np.float32)))
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "load_seconds": round(self.load_seconds, 4),
+            "warmup_seconds": round(self.warmup_seconds, 4) if self.warmup_seconds is not None else None,
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    def __init__(self, root: str = REGISTRY_DIR, fallback_path: str = None, n_classes: int = 3,
+                 candidate_fraction: float = 0.0, candidate_mode: str = "shadow", poll_interval: float = 5.0,
+                 warmup_batch_sizes=WARMUP_BATCH_SIZES):
+        self.root = root
+        self.fallback_path = fallback_path
+        self.n_classes = n_classes
+        self.warmup_batch_sizes = tuple(warmup_batch_sizes)
+        self.candidate_fraction = float(candidate_fraction)
+        self.candidate_mode = candidate_mode  # "shadow": active answers, "canary": candidate answers
+        self.poll_interval = poll_interval
+
+        self.active = None
+        self.candidate = None
+        self._history = []  # previously active versions, most recent last
+        self._seen = set()  # versions already considered (loaded, rejected or rolled back)
+        self._lock = threading.Lock()  # serialises swaps, not requests
+        self._control_lock = threading.RLock()  # serialises watcher polls, rollback and promote
+        self._stop = threading.Event()
+        self._watcher = None
+
+        self.swaps = deque(maxlen=50)
+        self.failures = deque(maxlen=50)
+        self.rollbacks = 0
+        self.shadow = {"comparisons": 0, "agreements": 0, "dropped": 0,
+                       "active_ms": deque(maxlen=1000), "candidate_ms": deque(maxlen=1000)}
+        # shadow predictions run here, off the request path; beyond max_shadow_pending they are dropped
+        self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow-compare")
+        self._shadow_pending = 0
+        self.max_shadow_pending = 32
+
+    # ---------- discovery / loading ----------
+
+    def versions(self) -> list:
+        """Complete, non-rejected versions in the registry, oldest first.
+
+        Hidden dirs (in-progress publishes) are skipped.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        rejected = self.rejected()
+        names = [n for n in os.listdir(self.root)
+                 if not n.startswith(".") and n not in rejected and self._artifact(os.path.join(self.root, n))]
+        return sorted(names, key=_natural_key)
+
+    # ---------- persisted decisions (shared by all workers) ----------
+
+    def _read(self, name: str) -> str:
+        try:
+            with open(os.path.join(self.root, name)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return ""
+
+    def _write(self, name: str, text: str):
+        """Write-then-rename, so a watcher never reads a half-written file."""
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f".tmp-{name}-{os.getpid()}")
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, os.path.join(self.root, name))
+
+    def rejected(self) -> set:
+        return {line.strip() for line in self._read(REJECTED_FILE).splitlines() if line.strip()}
+
+    def pinned(self):
+        """The version pinned by the last promote/rollback, if it is still available."""
+        version = self._read(ACTIVE_FILE).strip()
+        return version if version in self.versions() else None
+
+    def _reject(self, version: str):
+        rejected = self.rejected() | {version}
+        self._write(REJECTED_FILE, "".join(f"{v}\n" for v in sorted(rejected, key=_natural_key)))
+
+    def _pin(self, version: str):
+        self._write(ACTIVE_FILE, version + "\n")
+
+    @staticmethod
+    def _artifact(version_dir: str):
+        if not os.path.isdir(version_dir):
+            return None
+        saved_model = os.path.join(version_dir, SAVED_MODEL_DIR)
+        if os.path.exists(os.path.join(saved_model, "saved_model.pb")):
+            return saved_model
+        for fname in sorted(os.listdir(version_dir)):
+            if fname.endswith(MODEL_EXT):
+                return os.path.join(version_dir, fname)
+        return None
+
+    def load_version(self, version: str, path: str) -> ModelVersion:
+        """Load, warm up and smoke-test a model. Raises on any failure; never touches `active`."""
+        start = time.perf_counter()
+        model, fn = load_serving_fn(path)
+        mv = ModelVersion(version, path, model, fn, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        self._smoke_test(mv)
+        self._warm_up(mv)
+        mv.warmup_seconds = time.perf_counter() - start
+        logger.info("Loaded model %s from %s (load %.2fs, warm-up %.2fs)",
+                    version, path, mv.load_seconds, mv.warmup_seconds)
+        return mv
+
+    def _smoke_test(self, mv: ModelVersion):
+        """The outputs of a random batch must look like class probabilities."""
+        rng = np.random.default_rng(0)
+        batch = rng.uniform(0, 255, (2,) + INPUT_SHAPE).astype(np.float32)
+        preds = mv.predict(batch)
+        if preds.shape != (2, self.n_classes):
+            raise ValueError(f"smoke test: expected output shape (2, {self.n_classes}), got {preds.shape}")
+        if not np.all(np.isfinite(preds)) or not np.allclose(preds.sum(axis=1), 1.0, atol=1e-3):
+            raise ValueError("smoke test: outputs are not valid probabilities")
+
+    def _warm_up(self, mv: ModelVersion):
+        """Run synthetic batches at the common serving sizes so first requests hit warm kernels."""
+        for size in self.warmup_batch_sizes:
+            mv.predict(np.zeros((size,) + INPUT_SHAPE, dtype=np.float32))
+
+    def load_initial(self):
+        """Load the pinned (else newest) registry version, or `fallback_path` if the registry is empty."""
+        versions = self.versions()
+        pinned = self.pinned()
+        if pinned is not None:
+            # versions published after the pin are new releases: the watcher handles them as usual
+            versions = [v for v in versions if _natural_key(v) <= _natural_key(pinned)]
+        # everything up to what we load here is superseded; otherwise the first poll would
+        # treat the older versions as new and swap back to them
+        self._seen.update(versions)
+        for version in reversed(versions):
+            try:
+                self._swap(self.load_version(version, self._artifact(os.path.join(self.root, version))))
+                return self.active
+            except Exception as e:
+                logger.exception("Registry version %s failed to load: %s", version, e)
+                self.failures.append({"version": version, "error": str(e), "at": time.time()})
+        if self.fallback_path:
+            self._swap(self.load_version("builtin", self.fallback_path))
+        return self.active
+
+    # ---------- swapping ----------
+
+    def _swap(self, mv: ModelVersion):
+        start = time.perf_counter()
+        with self._lock:
+            previous = self.active
+            self._history = [h for h in self._history if h.version != mv.version]
+            if previous is not None and previous.version not in self.rejected():
+                self._history.append(previous)
+                del self._history[:-5]  # keep a few versions around for rollback
+            self.active = mv  # single reference assignment: the atomic part of the swap
+        swap_seconds = time.perf_counter() - start
+        self.swaps.append({"from": previous.version if previous else None, "to": mv.version,
+                           "swap_seconds": swap_seconds, "at": time.time()})
+        logger.info("Active model is now %s (swap %.6fs)", mv.version, swap_seconds)
+
+    def _loaded(self, version: str) -> ModelVersion:
+        """An already loaded ModelVersion for `version` (candidate or history), else load it."""
+        for mv in [self.candidate] + self._history[::-1]:
+            if mv is not None and mv.version == version:
+                return mv
+        return self.load_version(version, self._artifact(os.path.join(self.root, version)))
+
+    def rollback(self):
+        """Reject the active version and reactivate the previous one.
+
+        The decision is written to the registry, so other workers follow and a restart keeps it.
+        """
+        with self._control_lock:
+            current = self.active
+            if current is None:
+                return None
+            older = [v for v in self.versions() if v != current.version
+                     and _natural_key(v) < _natural_key(current.version)]
+            in_memory = [mv for mv in self._history if mv.version != current.version and mv.version in older]
+            if in_memory:
+                target = in_memory[-1]
+            elif older:
+                target = self._loaded(older[-1])
+            else:
+                return None
+            if current.version in self.versions():
+                self._reject(current.version)
+            self._pin(target.version)
+            self._swap(target)
+            self.rollbacks += 1
+        self.swaps[-1]["rollback"] = True
+        logger.warning("Rolled back from %s to %s", current.version, target.version)
+        return target
+
+    def promote_candidate(self):
+        with self._control_lock:
+            candidate = self.candidate
+            if candidate is None:
+                return None
+            self._pin(candidate.version)
+            self.candidate = None
+            self._swap(candidate)
+        return candidate
+
+    def _apply_decisions(self):
+        """Follow promote/rollback decisions made by other workers (or before a restart)."""
+        rejected = self.rejected()
+        if self.candidate is not None and self.candidate.version in rejected:
+            logger.warning("Candidate %s was rejected, dropping it", self.candidate.version)
+            self.candidate = None
+        self._history = [mv for mv in self._history if mv.version not in rejected]
+        pinned, active = self.pinned(), self.active
+        if pinned is None or (active is not None and active.version == pinned):
+            return
+        # a pin older than a (non-rejected) active version is stale: a newer release superseded it
+        if (active is None or active.version in rejected
+                or _natural_key(pinned) > _natural_key(active.version)):
+            self._swap(self._loaded(pinned))
+            if self.candidate is not None and self.candidate.version == pinned:
+                self.candidate = None
+
+    def poll_once(self):
+        """Apply shared decisions, then pick up the newest unseen version, if any."""
+        with self._control_lock:
+            self._apply_decisions()
+            return self._poll_new()
+
+    def _poll_new(self):
+        unseen = [v for v in self.versions() if v not in self._seen]
+        if not unseen:
+            return None
+        version = unseen[-1]
+        self._seen.update(unseen)  # older unseen versions are superseded
+        try:
+            mv = self.load_version(version, self._artifact(os.path.join(self.root, version)))
+        except Exception as e:
+            logger.exception("Registry version %s rejected: %s", version, e)
+            self.failures.append({"version": version, "error": str(e), "at": time.time()})
+            return None
+        if self.candidate_fraction > 0:
+            self.candidate = mv
+            logger.info("Model %s is the candidate for %.0f%% of traffic (%s)",
+                        version, self.candidate_fraction * 100, self.candidate_mode)
+        else:
+            self._swap(mv)
+        return mv
+
+    def start_watcher(self):
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    self.poll_once()
+                except Exception:
+                    logger.exception("Model watcher iteration failed")
+
+        self._watcher = threading.Thread(target=watch, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        self._shadow_pool.shutdown(wait=False)
+
+    # ---------- routing / shadow comparison ----------
+
+    def route(self, client_key: str):
+        """Return (serving, shadow, serving_is_candidate); a stable hash of `client_key` pins clients.
+
+        The flag is decided from the same snapshot as the pair: a promote in between must not
+        file the served latency under the wrong version.
+        """
+        active, candidate = self.active, self.candidate
+        if candidate is None or self.candidate_fraction <= 0:
+            return active, None, False
+        if zlib.crc32(client_key.encode("utf-8")) % 10000 >= self.candidate_fraction * 10000:
+            return active, None, False
+        if self.candidate_mode == "canary":
+            return candidate, active, True
+        return active, candidate, False
+
+    def submit_comparison(self, batch: np.ndarray, served_probs: np.ndarray, served_is_candidate: bool,
+                          shadow: ModelVersion, served_seconds: float):
+        """Queue compare() on the shadow worker so the request does not wait for a second forward pass."""
+        with self._lock:
+            if self._shadow_pending >= self.max_shadow_pending:
+                self.shadow["dropped"] += 1
+                return None
+            self._shadow_pending += 1
+
+        def run():
+            try:
+                return self.compare(batch, served_probs, served_is_candidate, shadow, served_seconds)
+            except Exception:
+                logger.exception("Shadow comparison with %s failed", shadow.version)
+            finally:
+                with self._lock:
+                    self._shadow_pending -= 1
+
+        return self._shadow_pool.submit(run)
+
+    def compare(self, batch: np.ndarray, served_probs: np.ndarray, served_is_candidate: bool,
+                shadow: ModelVersion, served_seconds: float):
+        """Run the shadow model on the same input and record agreement and latency.
+
+        `served_probs` / `served_seconds` must be the served model's own output and time.
+        """
+        start = time.perf_counter()
+        shadow_probs = shadow.predict(batch)
+        shadow_seconds = time.perf_counter() - start
+        agree = bool(np.all(np.argmax(shadow_probs, axis=-1) == np.argmax(served_probs, axis=-1)))
+        candidate_s, active_s = ((served_seconds, shadow_seconds) if served_is_candidate
+                                 else (shadow_seconds, served_seconds))
+        with self._lock:
+            self.shadow["comparisons"] += 1
+            self.shadow["agreements"] += int(agree)
+            self.shadow["active_ms"].append(active_s * 1000)
+            self.shadow["candidate_ms"].append(candidate_s * 1000)
+        return agree
+
+    def metrics(self) -> dict:
+        with self._lock:
+            shadow = dict(self.shadow)
+            active_ms, candidate_ms = list(shadow.pop("active_ms")), list(shadow.pop("candidate_ms"))
+        shadow["agreement_rate"] = (round(shadow["agreements"] / shadow["comparisons"], 4)
+                                    if shadow["comparisons"] else None)
+        shadow["active_mean_ms"] = round(float(np.mean(active_ms)), 3) if active_ms else None
+        shadow["candidate_mean_ms"] = round(float(np.mean(candidate_ms)), 3) if candidate_ms else None
+        return {
+            "active": self.active.info() if self.active else None,
+            "candidate": self.candidate.info() if self.candidate else None,
+            "candidate_fraction": self.candidate_fraction,
+            "candidate_mode": self.candidate_mode,
+            "rollback_available": [mv.version for mv in self._history],
+            "available_versions": self.versions(),
+            "pinned_version": self.pinned(),
+            "rejected_versions": sorted(self.rejected(), key=_natural_key),
+            "swaps": list(self.swaps),
+            "rollbacks": self.rollbacks,
+            "failures": list(self.failures),
+            "shadow": shadow,
+        }
+
+
+def publish(model_path: str, root: str = REGISTRY_DIR, version: str = None) -> str:
+    """Copy a model file or SavedModel dir into the registry as a new version.
+
+    Atomic from the watcher's point of view.
+    """
+    os.makedirs(root, exist_ok=True)
+    if version is None:
+        existing = [int(m.group(1)) for n in os.listdir(root) if (m := re.fullmatch(r"v(\d+)", n))]
+        version = f"v{max(existing, default=0) + 1:04d}"
+    final_dir = os.path.join(root, version)
+    if os.path.exists(final_dir):
+        raise FileExistsError(f"version {version} already exists in {root}")
+    tmp_dir = os.path.join(root, f".tmp-{version}")
+    if os.path.isdir(model_path):  # SavedModel export
+        shutil.copytree(model_path, os.path.join(tmp_dir, SAVED_MODEL_DIR))
+    else:
+        os.makedirs(tmp_dir)
+        shutil.copy2(model_path, os.path.join(tmp_dir, os.path.basename(model_path)))
+    os.rename(tmp_dir, final_dir)
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the Flask_CNN model registry.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pub = sub.add_parser("publish", help="add a .h5/.keras file or a SavedModel dir as a new version")
+    pub.add_argument("model")
+    pub.add_argument("--version")
+    pub.add_argument("--root", default=REGISTRY_DIR)
+    lst = sub.add_parser("list", help="list complete, non-rejected versions (* = pinned active)")
+    lst.add_argument("--root", default=REGISTRY_DIR)
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        print(publish(args.model, args.root, args.version))
+    else:
+        registry = ModelRegistry(args.root)
+        pinned = registry.pinned()
+        for version in registry.versions():
+            print(version + (" *" if version == pinned else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# test_model_registry.py — registry bookkeeping, with model loading stubbed out (no TensorFlow needed)
+#
+#   python -m pytest Flask_CNN/test_model_registry.py -q
+import os
+
+import numpy as np
+import pytest
+
+from model_registry import ModelRegistry, ModelVersion
+
+
+def _fake_load(version, path):
+    return ModelVersion(version, path, None, lambda x: np.full((len(x), 3), 1 / 3), 0.0)
+
+
+def _publish(root, version):
+    os.makedirs(os.path.join(root, version))
+    open(os.path.join(root, version, "fruits_cnn.h5"), "wb").close()
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    reg = ModelRegistry(str(tmp_path))
+    monkeypatch.setattr(reg, "load_version", _fake_load)
+    return reg
+
+
+def test_first_poll_keeps_newest_version(registry):
+    _publish(registry.root, "v0001")
+    _publish(registry.root, "v0002")
+    assert registry.load_initial().version == "v0002"
+    assert registry.poll_once() is None
+    assert registry.active.version == "v0002"
+
+
+def test_first_poll_does_not_make_older_version_candidate(registry):
+    registry.candidate_fraction = 0.5
+    _publish(registry.root, "v0001")
+    _publish(registry.root, "v0002")
+    registry.load_initial()
+    registry.poll_once()
+    assert registry.active.version == "v0002"
+    assert registry.candidate is None
+
+
+def test_new_version_after_startup_is_picked_up(registry):
+    _publish(registry.root, "v0001")
+    registry.load_initial()
+    _publish(registry.root, "v0002")
+    assert registry.poll_once().version == "v0002"
+    assert registry.active.version == "v0002"
+
+
+def _worker(root, monkeypatch, **kwargs):
+    reg = ModelRegistry(root, **kwargs)
+    monkeypatch.setattr(reg, "load_version", _fake_load)
+    return reg
+
+
+def test_rollback_reaches_other_workers_and_survives_restart(registry, monkeypatch):
+    _publish(registry.root, "v0001")
+    registry.load_initial()
+    other = _worker(registry.root, monkeypatch)
+    _publish(registry.root, "v0002")
+    registry.poll_once()
+    other.load_initial()
+    assert other.active.version == "v0002"
+
+    assert registry.rollback().version == "v0001"
+    assert registry.active.version == "v0001"
+    other.poll_once()
+    assert other.active.version == "v0001"
+
+    restarted = _worker(registry.root, monkeypatch)
+    assert restarted.load_initial().version == "v0001"
+    assert restarted.poll_once() is None
+    assert restarted.active.version == "v0001"
+
+
+def test_release_after_rollback_is_picked_up(registry, monkeypatch):
+    _publish(registry.root, "v0001")
+    _publish(registry.root, "v0002")
+    registry.load_initial()
+    registry.rollback()
+    _publish(registry.root, "v0003")
+    registry.poll_once()
+    assert registry.active.version == "v0003"
+    restarted = _worker(registry.root, monkeypatch)
+    restarted.load_initial()
+    restarted.poll_once()
+    assert restarted.active.version == "v0003"
+
+
+def test_promote_reaches_other_workers_and_survives_restart(registry, monkeypatch):
+    registry.candidate_fraction = 0.5
+    _publish(registry.root, "v0001")
+    registry.load_initial()
+    other = _worker(registry.root, monkeypatch, candidate_fraction=0.5)
+    other.load_initial()
+    _publish(registry.root, "v0002")
+    registry.poll_once()
+    other.poll_once()
+    assert other.candidate.version == "v0002"
+
+    assert registry.promote_candidate().version == "v0002"
+    other.poll_once()
+    assert other.active.version == "v0002"
+    assert other.candidate is None
+
+    restarted = _worker(registry.root, monkeypatch, candidate_fraction=0.5)
+    assert restarted.load_initial().version == "v0002"
+    restarted.poll_once()
+    assert restarted.candidate is None
+
+
+def test_unpromoted_candidate_is_candidate_again_after_restart(registry, monkeypatch):
+    registry.candidate_fraction = 0.5
+    _publish(registry.root, "v0001")
+    _publish(registry.root, "v0002")
+    registry.load_initial()
+    registry.rollback()  # pins v0001, rejects v0002
+    _publish(registry.root, "v0003")
+    restarted = _worker(registry.root, monkeypatch, candidate_fraction=0.5)
+    assert restarted.load_initial().version == "v0001"
+    restarted.poll_once()
+    assert restarted.candidate.version == "v0003"
+
+
+@pytest.mark.parametrize("mode, served, flag", [("canary", "v0002", True), ("shadow", "v0001", False)])
+def test_route_reports_whether_candidate_serves(registry, mode, served, flag):
+    registry.candidate_fraction, registry.candidate_mode = 1.0, mode
+    _publish(registry.root, "v0001")
+    registry.load_initial()
+    _publish(registry.root, "v0002")
+    registry.poll_once()
+    serving, shadow, is_candidate = registry.route("client")
+    assert (serving.version, is_candidate) == (served, flag)
+    assert shadow is not None and shadow is not serving
@@ -0,0 +1,171 @@
+# ann_index.py — tunable FAISS ANN indexes for the multi-document RAG
+#
+# Chroma's default setup keeps one exact-ish HNSW over full float32 vectors, which is
+# fine for one PDF but not for millions of chunks. Here the index type is a choice:
+#
+#   kind        faiss factory     memory / vector (d=384)   notes
+#   flat        Flat              1536 B                    exact, baseline for recall
+#   hnsw        HNSW{M}           1536 B + graph            fastest queries, most RAM
+#   hnsw_sq8    HNSW{M},SQ8       384 B + graph             HNSW over 8-bit scalar-quantized vectors
+#   ivf_sq8     IVF{nlist},SQ8    384 B                     needs training, tune nprobe
+#   ivf_pq      IVF{nlist},PQ{m}  m B                       smallest, lowest recall, tune nprobe
+#
+# Recall/latency trade-offs at query time: `ef_search` (HNSW) and `nprobe` (IVF).
+# Vectors are L2-normalised, so L2 ranking equals cosine ranking.
+import logging
+import math
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_KINDS = ("flat", "hnsw", "hnsw_sq8", "ivf_sq8", "ivf_pq")
+
+DEFAULTS = {
+    "hnsw_m": 32,          # graph degree
+    "ef_construction": 80,
+    "ef_search": 64,
+    "nlist": None,         # IVF cells, default ~4*sqrt(n)
+    "nprobe": 16,          # IVF cells visited per query
+    "pq_m": None,          # PQ sub-quantizers, default dim/8 (must divide dim)
+    "pq_nbits": 8,
+}
+
+# Below this many vectors the quantizers cannot be trained well and exact search is cheap anyway.
+MIN_VECTORS = {"ivf_sq8": 1_000, "ivf_pq": 10_000}
+
+
+def _params(n_vectors: int, dim: int, **overrides) -> dict:
+    params = dict(DEFAULTS)
+    params.update({k: v for k, v in overrides.items() if v is not None})
+    if params["nlist"] is None:
+        # ~4*sqrt(n) cells, but at least 39 training points per cell (FAISS' k-means minimum)
+        params["nlist"] = max(1, min(65536, int(4 * math.sqrt(max(n_vectors, 1))), n_vectors // 39))
+    if params["pq_m"] is None:
+        params["pq_m"] = max(1, dim // 8)
+    return params
+
+
+def factory_string(kind: str, dim: int, n_vectors: int, **overrides) -> str:
+    p = _params(n_vectors, dim, **overrides)
+    return {
+        "flat": "Flat",
+        "hnsw": f"HNSW{p['hnsw_m']}",
+        "hnsw_sq8": f"HNSW{p['hnsw_m']},SQ8",
+        "ivf_sq8": f"IVF{p['nlist']},SQ8",
+        "ivf_pq": f"IVF{p['nlist']},PQ{p['pq_m']}x{p['pq_nbits']}",
+    }[kind]
+
+
+def make_index(kind: str, dim: int, n_vectors: int, **overrides):
+    """Create an empty (possibly untrained) index sized for about `n_vectors` vectors."""
+    import faiss
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"unknown index kind {kind!r}, expected one of {INDEX_KINDS}")
+    if n_vectors < MIN_VECTORS.get(kind, 0):
+        logger.warning("%d vectors is too few to train %s, using exact search instead", n_vectors, kind)
+        kind = "flat"
+    p = _params(n_vectors, dim, **overrides)
+    index = faiss.index_factory(dim, factory_string(kind, dim, n_vectors, **overrides), faiss.METRIC_L2)
+    hnsw = _hnsw(index)
+    if hnsw is not None:
+        hnsw.efConstruction = p["ef_construction"]
+    set_search_params(index, nprobe=p["nprobe"], ef_search=p["ef_search"])
+    return index
+
+
+def training_size(index) -> int:
+    """How many vectors train() wants: 0 for untrained-free indexes, ~50 per IVF cell otherwise."""
+    import faiss
+    if index.is_trained:
+        return 0
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return min(ivf.nlist * 50, 500_000)
+    return 10_000  # scalar quantizer range estimation
+
+
+def train(index, vectors: np.ndarray):
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def _hnsw(index):
+    import faiss
+    base = faiss.downcast_index(index)
+    return getattr(base, "hnsw", None)
+
+
+def set_search_params(index, nprobe: int = None, ef_search: int = None):
+    """Adjust the recall/latency knobs of an existing index (safe to call on any kind)."""
+    import faiss
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe is not None:
+        ivf.nprobe = min(int(nprobe), ivf.nlist)
+    hnsw = _hnsw(index)
+    if hnsw is not None and ef_search is not None:
+        hnsw.efSearch = int(ef_search)
+
+
+def build_index(vectors: np.ndarray, kind: str = "hnsw", **overrides):
+    """Normalise, train on a sample and add all vectors. Returns the ready index."""
+    import faiss
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    index = make_index(kind, vectors.shape[1], len(vectors), **overrides)
+    n_train = training_size(index)
+    if n_train:
+        sample = vectors[np.random.default_rng(0).choice(len(vectors), min(n_train, len(vectors)), replace=False)]
+        train(index, sample)
+    index.add(vectors)
+    return index
+
+
+def index_memory_bytes(index) -> int:
+    """Serialized size: what the index occupies in RAM, excluding the LangChain docstore text."""
+    import faiss
+    return int(faiss.serialize_index(index).size)
+
+
+def build_vectorstore(docs: list, embeddings, kind: str = "hnsw", batch_size: int = 512, **overrides):
+    """Embed `docs` in batches into a LangChain FAISS store backed by the chosen ANN index.
+
+    Only the first batches (enough to train IVF/SQ quantizers) are held before the index
+    exists; the rest are embedded and added batch by batch, so memory stays bounded.
+    """
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    def batches():
+        for i in range(0, len(docs), batch_size):
+            chunk = docs[i:i + batch_size]
+            texts = [d.page_content for d in chunk]
+            yield texts, [d.metadata for d in chunk], np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+    if not docs:
+        raise ValueError("no documents to index (no text could be extracted from the PDFs?)")
+    stream = batches()
+    pending = []
+    texts, metadatas, vectors = next(stream)
+    pending.append((texts, metadatas, vectors))
+    index = make_index(kind, vectors.shape[1], len(docs), **overrides)
+
+    n_train = training_size(index)
+    while sum(len(p[0]) for p in pending) < n_train:
+        try:
+            pending.append(next(stream))
+        except StopIteration:
+            break
+    if n_train:
+        import faiss
+        sample = np.concatenate([p[2] for p in pending])
+        faiss.normalize_L2(sample)
+        train(index, sample)
+
+    store = FAISS(embedding_function=embeddings, index=index, docstore=InMemoryDocstore(),
+                  index_to_docstore_id={}, normalize_L2=True)
+    for texts, metadatas, vectors in pending:
+        store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+    for texts, metadatas, vectors in stream:
+        store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+    return store
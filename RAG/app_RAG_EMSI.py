@@ -8,18 +8,49 @@
 # 3/ Améliorer le programme
 #*******************************************************************************
 
+import os
+import tempfile
+
 import streamlit as st
 
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.document_loaders import PyPDFLoader, PyPDFDirectoryLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+from langchain_community.vectorstores import FAISS
 from langchain_community.llms import Ollama
 
 from langchain_classic.chains import RetrievalQA
 
+from ann_index import INDEX_KINDS, build_vectorstore, set_search_params
+
+# Where the built index is saved, so the school's collection is embedded once, not per session
+INDEX_DIR = os.path.join(os.path.dirname(__file__), "faiss_index")
+INDEX_FILE = os.path.join(INDEX_DIR, "index.faiss")
+
+@st.cache_resource
+def load_embeddings():
+    return HuggingFaceEmbeddings()
+
+@st.cache_resource(max_entries=1)
+def load_index(mtime: float):
+    """One copy of the saved index shared by every session; a rebuild (new mtime) replaces it.
+
+    Search knobs set on it are shared too: the last session to change them wins.
+    """
+    # queries must be normalised like the stored vectors
+    return FAISS.load_local(INDEX_DIR, load_embeddings(), normalize_L2=True, allow_dangerous_deserialization=True)
+
+def make_qa_chain(db, k):
+    llm = Ollama(model="llama3.2")  # Or your preferred Ollama model
+    return RetrievalQA.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=db.as_retriever(search_kwargs={"k": k}),
+        return_source_documents=True,
+    )
+
 
 
 # Set Streamlit page configuration
@@ -28,48 +59,64 @@ st.set_page_config(page_title="PDF-RAG", page_icon="👀")
 
 # Sidebar for PDF upload
 st.sidebar.title("Upload PDF")
-uploaded_file = st.sidebar.file_uploader("Choose a PDF file", type="pdf")
+uploaded_files = st.sidebar.file_uploader("Choose PDF files", type="pdf", accept_multiple_files=True)
+pdf_folder = st.sidebar.text_input("...or index every PDF in a folder", placeholder="/path/to/documents")
+build_clicked = st.sidebar.button("Build index")
+
+# Index settings: recall vs latency vs RAM (see ann_index.py)
+with st.sidebar.expander("Index settings"):
+    index_kind = st.selectbox("Index type", INDEX_KINDS, index=INDEX_KINDS.index("hnsw"),
+                              help="flat = exact; hnsw = fast, most RAM; *_sq8 = 4x smaller vectors; ivf_pq = smallest")
+    ef_search = st.slider("HNSW ef_search", 16, 512, 64, step=16, help="higher = better recall, slower queries")
+    nprobe = st.slider("IVF nprobe", 1, 256, 16, help="higher = better recall, slower queries")
+    top_k = st.slider("Chunks retrieved (k)", 1, 20, 4)
 
 # Main area for Q&A
-st.title("Local PDF-RAG with LangChain, Ollama, and Chroma")
+st.title("Local PDF-RAG with LangChain, Ollama, and FAISS")
 
 # Initialize session state
-if "db" not in st.session_state:
-    st.session_state.db = None
-
 if "qa_chain" not in st.session_state:
     st.session_state.qa_chain = None
 
 # Handle PDF upload and processing
-if uploaded_file is not None:
-    with st.spinner("Processing PDF..."):
-        # Save the uploaded file temporarily
-        with open(uploaded_file.name, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-
-        # Load and split the PDF
-        loader = PyPDFLoader(uploaded_file.name)
-        documents = loader.load()
+if build_clicked and pdf_folder and not os.path.isdir(pdf_folder):
+    st.error(f"Folder not found: {pdf_folder}")
+elif build_clicked and (uploaded_files or pdf_folder):
+    with st.spinner("Processing PDFs..."):
+        documents = []
+        with tempfile.TemporaryDirectory() as tmp:
+            # Save the uploaded files temporarily
+            for uploaded_file in uploaded_files:
+                path = os.path.join(tmp, uploaded_file.name)
+                with open(path, "wb") as f:
+                    f.write(uploaded_file.getbuffer())
+                documents.extend(PyPDFLoader(path).load())
+        if pdf_folder:
+            documents.extend(PyPDFDirectoryLoader(pdf_folder, recursive=True).load())
+
         text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
         texts = text_splitter.split_documents(documents)
 
-        # Create embeddings and store in Chroma
-        embeddings = HuggingFaceEmbeddings()
-        st.session_state.db = Chroma.from_documents(texts, embeddings)
-
-        # Initialize the QA chain with Ollama
-        llm = Ollama(model="llama3.2")  # Or your preferred Ollama model
-        st.session_state.qa_chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="stuff",
-            retriever=st.session_state.db.as_retriever(),
-            return_source_documents=True,
-        )
-
-        st.success("PDF processed and ready for questions!")
+        # Create embeddings batch by batch into the selected ANN index
+        try:
+            db = build_vectorstore(texts, load_embeddings(), kind=index_kind, ef_search=ef_search, nprobe=nprobe)
+        except ValueError as e:
+            st.error(f"Nothing was indexed: {e}")
+        else:
+            # saved, then served through load_index like every other session's copy
+            db.save_local(INDEX_DIR)
+            del db
+            st.success(f"{len(documents)} pages / {len(texts)} chunks indexed and ready for questions!")
+
+# Search knobs apply to the current index without rebuilding it
+if os.path.exists(INDEX_FILE):
+    db = load_index(os.path.getmtime(INDEX_FILE))
+    set_search_params(db.index, nprobe=nprobe, ef_search=ef_search)
+    st.session_state.qa_chain = make_qa_chain(db, top_k)
+    st.sidebar.caption(f"{db.index.ntotal} chunks · index {os.path.getsize(INDEX_FILE) / 2**20:.1f} MB")
 
 # User input for query
-query = st.chat_input("Ask a question about the PDF:")
+query = st.chat_input("Ask a question about the documents:")
 
 # Generate and display response
 if query and st.session_state.qa_chain:
@@ -78,4 +125,4 @@ if query and st.session_state.qa_chain:
         st.write("**Answer:**", result["result"])
         st.write("**Sources:**")
         for doc in result["source_documents"]:
-            st.write(f"- {doc.metadata['source']} (page {doc.metadata['page']})")
\ No newline at end of file
+            st.write(f"- {os.path.basename(doc.metadata['source'])} (page {doc.metadata['page']})")
\ No newline at end of file
@@ -0,0 +1,124 @@
+# benchmark_ann.py — recall@k, p99 latency and memory of the ann_index.py index kinds
+#
+# Usage:
+#   python RAG/benchmark_ann.py --sizes 10000 100000 1000000 --dim 384 --k 4
+#
+# Synthetic corpus: topic clusters with low intrinsic dimension, like real chunk
+# embeddings (see synthetic_corpus). Ground truth comes from exact search
+# (IndexFlatL2). Latency is measured one query at a time, as the RAG app issues them.
+# Note: 1M x 384 float32 is ~1.5 GB before any index is built.
+import argparse
+import json
+import time
+
+import numpy as np
+
+from ann_index import INDEX_KINDS, build_index, index_memory_bytes, set_search_params
+
+# (kind, search params) pairs; several operating points per kind show the trade-off curve
+CONFIGS = [
+    ("flat", {}),
+    ("hnsw", {"ef_search": 32}),
+    ("hnsw", {"ef_search": 128}),
+    ("hnsw_sq8", {"ef_search": 128}),
+    ("ivf_sq8", {"nprobe": 8}),
+    ("ivf_sq8", {"nprobe": 32}),
+    ("ivf_pq", {"nprobe": 8}),
+    ("ivf_pq", {"nprobe": 32}),
+]
+
+
+def synthetic_corpus(n: int, dim: int, n_queries: int, latent: int = 48, seed: int = 0):
+    """Topic clusters in a low-dimensional latent space, projected to `dim` plus a little noise.
+
+    Sentence embeddings have a much lower intrinsic dimension than their width; isotropic
+    Gaussian vectors would make every point almost equidistant and every ANN index look bad.
+    """
+    rng = np.random.default_rng(seed)
+    projection = rng.standard_normal((latent, dim)).astype(np.float32)
+    n_topics = max(10, n // 1000)
+    topics = rng.standard_normal((n_topics, latent)).astype(np.float32)
+
+    def sample(m):
+        out = np.empty((m, dim), dtype=np.float32)
+        for start in range(0, m, 100_000):  # chunked to keep temporaries small at 1M
+            stop = min(start + 100_000, m)
+            z = topics[rng.integers(0, n_topics, stop - start)]
+            z = z + 0.7 * rng.standard_normal(z.shape, dtype=np.float32)
+            out[start:stop] = z @ projection + 0.3 * rng.standard_normal((stop - start, dim), dtype=np.float32)
+        out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out
+
+    return sample(n), sample(n_queries)
+
+
+def ground_truth(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    import faiss
+    exact = faiss.IndexFlatL2(corpus.shape[1])
+    exact.add(corpus)
+    return exact.search(queries, k)[1]
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f[:k]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def bench(kind: str, params: dict, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int,
+          cache: dict) -> dict:
+    # build once per kind, search params only change the query-time knobs
+    if kind not in cache:
+        start = time.perf_counter()
+        cache[kind] = (build_index(corpus, kind), time.perf_counter() - start)
+    index, build_s = cache[kind]
+    set_search_params(index, **params)
+
+    found = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries))
+    for i, q in enumerate(queries):
+        start = time.perf_counter()
+        found[i] = index.search(q[None, :], k)[1][0]
+        latencies[i] = time.perf_counter() - start
+
+    return {
+        "kind": kind,
+        **params,
+        "build_s": round(build_s, 2),
+        f"recall@{k}": round(recall_at_k(found, truth), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "index_mb": round(index_memory_bytes(index) / 2**20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ANN index kinds against exact search.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=4, help="the RAG retriever's default k")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--kinds", nargs="*", default=list(INDEX_KINDS))
+    parser.add_argument("--out", help="optional JSON output path")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        corpus, queries = synthetic_corpus(n, args.dim, args.queries)
+        truth = ground_truth(corpus, queries, args.k)
+        cache = {}
+        print(f"\n== {n} chunks, dim {args.dim}, {args.queries} queries ==")
+        for kind, params in CONFIGS:
+            if kind not in args.kinds:
+                continue
+            row = {"chunks": n, **bench(kind, params, corpus, queries, truth, args.k, cache)}
+            results.append(row)
+            print(json.dumps(row))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmark_batch.py — 100 uploads: old per-image path vs the batch mode of streamlit_main.py
+#
+# Usage:
+#   python Streamlit_CNN/benchmark_batch.py --images 100 --repeats 3
+#
+# per_image: PIL decode + resize + modelCNN.predict on one image at a time (the original app)
+# batch:     parallel decode + one direct model call per chunk of CHUNK_SIZE images
+import argparse
+import io
+import itertools
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from inference import CHUNK_SIZE, chunks, decode_parallel, predict_chunk
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(HERE, "fruits_cnn.h5")
+TEST_DIR = os.path.join(HERE, "..", "fruits", "test")
+
+
+def load_uploads(n: int) -> list:
+    paths = sorted(os.path.join(root, f) for root, _, files in os.walk(TEST_DIR) for f in files)
+    uploads = []
+    for path in itertools.islice(itertools.cycle(paths), n):
+        with open(path, "rb") as f:
+            uploads.append(f.read())
+    return uploads
+
+
+def per_image(model, uploads: list) -> np.ndarray:
+    preds = []
+    for content in uploads:
+        img = Image.open(io.BytesIO(content)).convert("RGB").resize((32, 32))
+        img_array = np.expand_dims(np.array(img), axis=0)
+        preds.append(model.predict(img_array, verbose=0)[0])
+    return np.stack(preds)
+
+
+def batched(model, uploads: list) -> np.ndarray:
+    return np.concatenate([predict_chunk(model, decode_parallel(chunk)[0]) for chunk in chunks(uploads, CHUNK_SIZE)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time per-image vs batched classification of uploads.")
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(MODEL_PATH)
+    uploads = load_uploads(args.images)
+    # warm both paths so neither pays graph building in the timings
+    per_image(model, uploads[:1])
+    batched(model, uploads[:CHUNK_SIZE])
+
+    timings = {}
+    outputs = {}
+    for name, fn in (("per_image", per_image), ("batch", batched)):
+        runs = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            outputs[name] = fn(model, uploads)
+            runs.append(time.perf_counter() - start)
+        timings[name] = float(np.median(runs))
+
+    same = np.array_equal(outputs["per_image"].argmax(axis=1), outputs["batch"].argmax(axis=1))
+    print(f"images: {len(uploads)}  chunk size: {CHUNK_SIZE}  identical predictions: {same}")
+    for name, seconds in timings.items():
+        print(f"{name:>10}: {seconds * 1000:8.1f} ms total  {seconds * 1000 / len(uploads):6.2f} ms/image")
+    print(f"   speedup: {timings['per_image'] / timings['batch']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
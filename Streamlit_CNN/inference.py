@@ -0,0 +1,48 @@
+# inference.py — image decoding and batched prediction shared by streamlit_main.py and benchmark_batch.py
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+IMG_SIZE = (32, 32)
+CHUNK_SIZE = 32
+
+
+def preprocess(file_bytes: bytes) -> np.ndarray:
+    """Uploaded file -> float32 (32, 32, 3), raw 0-255 RGB (the model rescales itself)."""
+    img = Image.open(io.BytesIO(file_bytes)).convert("RGB").resize(IMG_SIZE)
+    return np.asarray(img, dtype=np.float32)
+
+
+def _try_preprocess(file_bytes: bytes):
+    try:
+        return preprocess(file_bytes), None
+    except UnidentifiedImageError:
+        return None, "not a valid image"
+    except Exception as e:  # truncated files, decompression bombs...: one bad upload must not sink the batch
+        return None, f"{type(e).__name__}: {e}"
+
+
+def decode_parallel(files: list, workers: int = 8):
+    """Decode and resize many uploads at once. PIL releases the GIL while decoding, so threads help.
+
+    Returns (batch, failed): `batch` holds the images that decoded, in order, and `failed`
+    maps the index of every file that did not to the reason.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        decoded = list(pool.map(_try_preprocess, files))
+    failed = {i: error for i, (_, error) in enumerate(decoded) if error is not None}
+    images = [img for img, error in decoded if error is None]
+    batch = np.stack(images) if images else np.empty((0,) + IMG_SIZE + (3,), dtype=np.float32)
+    return batch, failed
+
+
+def predict_chunk(model, batch: np.ndarray) -> np.ndarray:
+    """One vectorized forward pass. Calling the model directly skips model.predict()'s per-call setup."""
+    return np.asarray(model(batch, training=False))
+
+
+def chunks(items: list, size: int = CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
@@ -1,39 +1,98 @@
+import os
+
 import streamlit as st
 import numpy as np
+import pandas as pd
 import tensorflow as tf
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
+
+from inference import CHUNK_SIZE, chunks, decode_parallel, predict_chunk
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), 'fruits_cnn.h5')
 
+@st.cache_resource
 def load_model():
-    model = tf.keras.models.load_model('fruits_cnn.h5')
+    # loaded once per server process instead of on every rerun
+    model = tf.keras.models.load_model(MODEL_PATH)
     return model
 
 modelCNN = load_model()
 
 classes=["apple","banana","orange"]
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def classify_chunk(contents: tuple):
+    # memoized on the file bytes: reruns and re-uploads of the same images cost nothing
+    # returns (probabilities of the files that decoded, {index in chunk: error} for the rest)
+    batch, failed = decode_parallel(list(contents))
+    if not len(batch):
+        return np.empty((0, len(classes)), dtype=np.float32), failed
+    return predict_chunk(modelCNN, batch), failed
+
 st.title("Fruits classification application")
 st.write("Upload an image of a fruit to identify if it'is a **Banana** or **Orange** or **Apple**.")
 
-uploadad_file=st.file_uploader("Upload an image here:",type=["png","jpg","jpeg"])
+mode = st.radio("Mode", ["Single image", "Batch"], horizontal=True)
 
-if uploadad_file is not None:
-    image = Image.open(uploadad_file).convert("RGB")
-    st.image(image, caption="Uploaded image", use_container_width=True)
+if mode == "Single image":
+    uploadad_file=st.file_uploader("Upload an image here:",type=["png","jpg","jpeg"])
 
-    img=image.resize((32,32))
-    img_array=np.array(img)
-    img_array=np.expand_dims(img_array,axis=0)
+    if uploadad_file is not None:
+        try:
+            image = Image.open(uploadad_file).convert("RGB")
+        except (UnidentifiedImageError, OSError):
+            st.error(f"{uploadad_file.name} is not a valid image.")
+            st.stop()
+        st.image(image, caption="Uploaded image", use_container_width=True)
 
-    predictions=modelCNN.predict(img_array)
-    predicted_class = classes[np.argmax(predictions)]
-    confidence = np.max(predictions)*100
+        predictions, _ = classify_chunk((uploadad_file.getvalue(),))
+        predicted_class = classes[np.argmax(predictions)]
+        confidence = np.max(predictions)*100
 
-    st.subheader("**Prediction results:**")
-    st.success(f"Predicted fruit: {predicted_class}")
-    st.write(f"**Confidence**: {confidence}")
+        st.subheader("**Prediction results:**")
+        st.success(f"Predicted fruit: {predicted_class}")
+        st.write(f"**Confidence**: {confidence:.2f}%")
 
-    st.write("class probabilities:")
-    for i, label in enumerate(classes):
-        st.write(f"*****{label} : {predictions[0][i]*100:.2f}%****")
+        st.write("class probabilities:")
+        st.dataframe(pd.DataFrame({"class": classes, "probability (%)": np.round(predictions[0]*100, 2)}),
+                     hide_index=True)
+
+    else:
+        st.info("Please upload an image.")
 
 else:
-    st.info("Please upload an image.")
+    uploaded_files = st.file_uploader("Upload images here:", type=["png","jpg","jpeg"], accept_multiple_files=True)
+
+    if uploaded_files:
+        contents = [f.getvalue() for f in uploaded_files]
+        progress = st.progress(0.0, text=f"Classifying {len(contents)} images...")
+        # files that fail to decode keep their row, with NaN probabilities and the reason
+        predictions = np.full((len(contents), len(classes)), np.nan, dtype=np.float32)
+        errors = [""] * len(contents)
+        for i, chunk in enumerate(chunks(contents, CHUNK_SIZE)):
+            probs, failed = classify_chunk(tuple(chunk))
+            offset = i * CHUNK_SIZE
+            decoded = [offset + j for j in range(len(chunk)) if j not in failed]
+            predictions[decoded] = probs
+            for j, error in failed.items():
+                errors[offset + j] = error
+            done = min((i + 1) * CHUNK_SIZE, len(contents))
+            progress.progress(done / len(contents), text=f"Classified {done}/{len(contents)} images")
+        progress.empty()
+
+        ok = ~np.isnan(predictions).any(axis=1)
+        table = pd.DataFrame(predictions*100, columns=[f"{c} (%)" for c in classes]).round(2)
+        table.insert(0, "file", [f.name for f in uploaded_files])
+        table.insert(1, "prediction", [classes[i] if good else "error"
+                                       for i, good in zip(np.argmax(np.nan_to_num(predictions), axis=1), ok)])
+        table.insert(2, "confidence (%)", np.round(np.max(predictions, axis=1)*100, 2))
+        table["error"] = errors
+
+        st.subheader("**Prediction results:**")
+        if not ok.all():
+            st.error(f"{int((~ok).sum())} of {len(contents)} files could not be read as images (see the error column).")
+        st.dataframe(table, hide_index=True, use_container_width=True)
+        st.write(table["prediction"].value_counts().rename("count"))
+
+    else:
+        st.info("Please upload one or more images.")
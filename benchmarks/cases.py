@@ -0,0 +1,302 @@
+# cases.py — the benchmark cases run by run.py
+#
+# Every case is a function returning {metric_name: (value, unit, better)} where
+# `better` is "lower" or "higher"; compare.py uses it to decide what a regression is.
+# A case that cannot run here (missing optional dependency, missing artifact) raises
+# Skip with the reason instead of failing the whole suite. Everything runs offline on CPU.
+# A case whose result depends on a serving configuration records it in CASE_CONFIG;
+# run.py stores it in the report's meta and compare.py warns when two runs differ.
+import contextlib
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FLASK_DIR = os.path.join(ROOT, "Flask_CNN")
+STREAMLIT_DIR = os.path.join(ROOT, "Streamlit_CNN")
+RAG_DIR = os.path.join(ROOT, "RAG")
+CHAT_API_DIR = os.path.join(ROOT, "streamlitgeminillm")
+TFLITE_PATH = os.path.join(ROOT, "tflite", "fruits_cnn.tflite")
+KERAS_PATH = os.path.join(FLASK_DIR, "fruits_cnn.h5")
+SAMPLE_DIR = os.path.join(ROOT, "fruits", "test")
+
+
+CASE_CONFIG = {}
+
+
+class Skip(Exception):
+    pass
+
+
+def _use(app_dir: str):
+    """The apps are plain script folders, not packages: import their modules by folder."""
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+
+
+def _require(module: str):
+    try:
+        __import__(module)
+    except ImportError as e:
+        raise Skip(f"{module} not installed ({e})")
+
+
+def _timings(fn, repeats: int, warmup: int = 3) -> np.ndarray:
+    for _ in range(warmup):
+        fn()
+    out = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        out[i] = time.perf_counter() - start
+    return out * 1000  # ms
+
+
+def _sample_images(n: int) -> list:
+    paths = sorted(os.path.join(root, f) for root, _, files in os.walk(SAMPLE_DIR) for f in files)
+    images = []
+    for i in range(n):
+        with open(paths[i % len(paths)], "rb") as f:
+            images.append(f.read())
+    return images
+
+
+# ---------- image preprocessing ----------
+
+def preprocessing(repeats: int) -> dict:
+    _require("PIL")
+    _use(STREAMLIT_DIR)
+    from inference import decode_parallel, preprocess
+
+    images = _sample_images(32)
+    single = _timings(lambda: preprocess(images[0]), repeats * 5)
+    batch = _timings(lambda: decode_parallel(images), repeats)
+    return {
+        "single_ms": (float(np.median(single)), "ms", "lower"),
+        "parallel_32_ms": (float(np.median(batch)), "ms", "lower"),
+    }
+
+
+# ---------- CNN inference ----------
+
+def cnn_keras(repeats: int) -> dict:
+    _require("tensorflow")
+    _use(FLASK_DIR)
+    from model_registry import load_serving_fn
+
+    _, fn = load_serving_fn(KERAS_PATH)  # the same fixed-signature function app_flask.py serves
+    x1 = np.random.default_rng(0).uniform(0, 255, (1, 32, 32, 3)).astype(np.float32)
+    x32 = np.random.default_rng(1).uniform(0, 255, (32, 32, 32, 3)).astype(np.float32)
+    single = _timings(lambda: fn(x1).numpy(), repeats * 5)
+    batch = _timings(lambda: fn(x32).numpy(), repeats)
+    return {
+        "single_ms": (float(np.median(single)), "ms", "lower"),
+        "batch32_ms_per_image": (float(np.median(batch)) / 32, "ms", "lower"),
+    }
+
+
+def cnn_tflite(repeats: int) -> dict:
+    _require("tensorflow")
+    _use(FLASK_DIR)
+    from cascade import TFLiteClassifier
+
+    if not os.path.exists(TFLITE_PATH):
+        raise Skip(f"{TFLITE_PATH} missing")
+    clf = TFLiteClassifier(TFLITE_PATH)
+    x1 = np.random.default_rng(0).uniform(0, 255, (1, 32, 32, 3)).astype(np.float32)
+    x32 = np.random.default_rng(1).uniform(0, 255, (32, 32, 32, 3)).astype(np.float32)
+    single = _timings(lambda: clf.predict(x1), repeats * 5)
+    batch = _timings(lambda: clf.predict(x32), repeats)
+    return {
+        "single_ms": (float(np.median(single)), "ms", "lower"),
+        "batch32_ms_per_image": (float(np.median(batch)) / 32, "ms", "lower"),
+    }
+
+
+# ---------- Flask endpoint under concurrent load ----------
+
+def flask_throughput(repeats: int, clients: int = 8) -> dict:
+    _require("tensorflow")
+    _require("flask")
+    _use(FLASK_DIR)
+    from model_registry import publish
+
+    if not os.path.exists(KERAS_PATH):
+        raise Skip(f"{KERAS_PATH} missing")
+    # Pin the serving path: the .h5 through a one-version registry, no cascade, no candidate,
+    # whatever gitignored local artifacts (cascade.json, the SavedModel export) exist here.
+    registry_dir = tempfile.mkdtemp(prefix="bench-registry-")
+    publish(KERAS_PATH, registry_dir)
+    env = {"STARTUP_MODE": "eager", "MODEL_REGISTRY_DIR": registry_dir,
+           "CASCADE_MODEL_PATH": "", "CANDIDATE_TRAFFIC": "0"}
+    saved_env = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    werkzeug_log = logging.getLogger("werkzeug")
+    saved_level = werkzeug_log.level
+    werkzeug_log.setLevel(logging.WARNING)  # one access-log line per request would skew the timings
+    server = app_flask = None
+    try:
+        from werkzeug.serving import make_server
+        import app_flask
+        from benchmark_startup import post_image
+
+        active = app_flask.registry.active
+        CASE_CONFIG["flask_throughput"] = {
+            "served_model": os.path.relpath(active.path, registry_dir) if active else None,
+            "cascade": app_flask.cascade is not None,
+            "candidate_traffic": app_flask.registry.candidate_fraction,
+            "clients": clients,
+        }
+        server = make_server("127.0.0.1", 0, app_flask.app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_port}/predict"
+        images = _sample_images(clients)
+        for img in images:
+            post_image(url, img)  # warm-up
+        n_requests = max(repeats * 10, clients * 4)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            latencies = list(pool.map(lambda i: post_image(url, images[i % clients]), range(n_requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.shutdown()
+        if app_flask is not None:
+            app_flask.registry.stop_watcher()
+        werkzeug_log.setLevel(saved_level)
+        for k, v in saved_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        shutil.rmtree(registry_dir, ignore_errors=True)
+    return {
+        "requests_per_s": (n_requests / elapsed, "req/s", "higher"),
+        "p50_ms": (float(np.percentile(latencies, 50)), "ms", "lower"),
+        "p95_ms": (float(np.percentile(latencies, 95)), "ms", "lower"),
+    }
+
+
+# ---------- chat API overhead (stubbed LLM) ----------
+
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _StubModels:
+    def generate_content(self, model, contents):
+        return _StubResponse("Réponse de test. " * 20)
+
+
+class _StubClient:
+    """Stands in for genai.Client: returns instantly, so only the API's own work is timed."""
+    models = _StubModels()
+
+
+def chat_api(repeats: int) -> dict:
+    _require("flask")
+    _require("flask_cors")
+    _require("dotenv")
+    _require("google.genai")
+    _use(CHAT_API_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import api
+    api.client = _StubClient()
+    client = api.app.test_client()
+    payload = {"message": "Bonjour, quels sont les horaires de la bibliothèque ?", "user_id": "bench", "user_name": "Bench"}
+
+    def call():
+        with contextlib.redirect_stdout(io.StringIO()):  # the API prints every exchange
+            resp = client.post("/api/chat", json=payload)
+        assert resp.status_code == 200
+
+    timings = _timings(call, repeats * 20)
+    return {
+        "chat_p50_ms": (float(np.percentile(timings, 50)), "ms", "lower"),
+        "chat_p95_ms": (float(np.percentile(timings, 95)), "ms", "lower"),
+    }
+
+
+# ---------- RAG ingest / query ----------
+
+try:
+    from langchain_core.embeddings import Embeddings as _EmbeddingsBase
+except ImportError:  # the rag case skips itself without LangChain
+    _EmbeddingsBase = object
+
+
+class HashingEmbeddings(_EmbeddingsBase):
+    """Tiny local embedding model: hashed bag of words + bigrams, L2-normalised.
+
+    Deterministic, no download, a few microseconds per chunk: it exercises the RAG plumbing
+    (splitting, batching, indexing, search) without a transformer dominating the timings.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        words = text.lower().split()
+        for token in words + [a + " " + b for a, b in zip(words, words[1:])]:
+            vec[zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self._embed(text)
+
+
+def _synthetic_pages(n_pages: int) -> list:
+    from langchain_core.documents import Document
+    rng = np.random.default_rng(0)
+    vocab = [f"mot{i}" for i in range(2000)]
+    return [Document(page_content=" ".join(rng.choice(vocab, 300)), metadata={"source": f"doc{i // 10}.pdf", "page": i % 10})
+            for i in range(n_pages)]
+
+
+def rag(repeats: int, n_pages: int = 500) -> dict:
+    _require("faiss")
+    _require("langchain_community")
+    _require("langchain_text_splitters")
+    _use(RAG_DIR)
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from ann_index import build_vectorstore
+
+    pages = _synthetic_pages(n_pages)
+    embeddings = HashingEmbeddings()
+    start = time.perf_counter()
+    chunks = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150).split_documents(pages)
+    store = build_vectorstore(chunks, embeddings, kind="hnsw")
+    ingest_s = time.perf_counter() - start
+
+    queries = [" ".join(c.page_content.split()[:12]) for c in chunks[:: max(1, len(chunks) // 50)]]
+    timings = _timings(lambda: [store.similarity_search(q, k=4) for q in queries], repeats) / len(queries)
+    return {
+        "ingest_chunks_per_s": (len(chunks) / ingest_s, "chunks/s", "higher"),
+        "query_ms": (float(np.median(timings)), "ms", "lower"),
+    }
+
+
+CASES = {
+    "preprocessing": preprocessing,
+    "cnn_keras": cnn_keras,
+    "cnn_tflite": cnn_tflite,
+    "flask_throughput": flask_throughput,
+    "chat_api": chat_api,
+    "rag": rag,
+}
@@ -0,0 +1,92 @@
+# compare.py — flag performance regressions between two benchmark runs
+#
+# Usage:
+#   python benchmarks/compare.py a1b2c3d e4f5a6b --threshold 0.10
+#   python benchmarks/compare.py old.json new.json
+#
+# Arguments are result files or commit ids (looked up in benchmarks/results/).
+# A metric regresses when it moves in its "worse" direction by more than the
+# threshold (relative). Exit code 1 if anything regressed or a metric of the old run is
+# missing from the new one (its case errored or was skipped), so CI can gate on it.
+import argparse
+import glob
+import json
+import os
+import sys
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def load(ref: str) -> dict:
+    exact = os.path.join(RESULTS_DIR, f"{ref}.json")
+    if os.path.exists(ref):
+        path = ref
+    elif os.path.exists(exact):
+        path = exact
+    else:
+        # a commit prefix; "abc1234" may also match "abc1234-dirty.json", so insist on one file
+        matches = sorted(glob.glob(os.path.join(RESULTS_DIR, f"{ref}*.json")))
+        if not matches:
+            raise SystemExit(f"no results for {ref!r} (looked for a file or {RESULTS_DIR}/{ref}*.json)")
+        if len(matches) > 1:
+            names = ", ".join(os.path.basename(m) for m in matches)
+            raise SystemExit(f"{ref!r} is ambiguous, matches {names}; pass the full name")
+        path = matches[0]
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(old: dict, new: dict, threshold: float) -> list:
+    rows = []
+    for key in sorted(set(old["results"]) | set(new["results"])):
+        if key not in old["results"] or key not in new["results"]:
+            rows.append({"metric": key, "old": old["results"].get(key, {}).get("value"),
+                         "new": new["results"].get(key, {}).get("value"), "change": None,
+                         "status": "MISSING" if key not in new["results"] else "added"})
+            continue
+        before, after = old["results"][key], new["results"][key]
+        change = (after["value"] - before["value"]) / before["value"] if before["value"] else 0.0
+        worse = change if before["better"] == "lower" else -change
+        status = "REGRESSION" if worse > threshold else ("improved" if worse < -threshold else "ok")
+        rows.append({"metric": key, "old": before["value"], "new": after["value"], "unit": before["unit"],
+                     "change": change, "status": status})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="do not fail when metrics of the old run are missing from the new one")
+    args = parser.parse_args()
+
+    old, new = load(args.old), load(args.new)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}  (threshold {args.threshold:.0%})")
+    if old["meta"].get("platform") != new["meta"].get("platform"):
+        print("warning: results come from different platforms, timings may not be comparable")
+    old_config, new_config = old["meta"].get("case_config", {}), new["meta"].get("case_config", {})
+    for case in sorted(set(old_config) & set(new_config)):
+        if old_config[case] != new_config[case]:
+            print(f"warning: {case} ran with a different configuration: {old_config[case]} -> {new_config[case]}")
+
+    rows = compare(old, new, args.threshold)
+    width = max((len(r["metric"]) for r in rows), default=10)
+    for r in rows:
+        change = f"{r['change']:+.1%}" if r["change"] is not None else "n/a"
+        print(f"{r['metric']:<{width}}  {str(r['old']):>12}  {str(r['new']):>12}  {change:>8}  {r['status']}")
+
+    for name, reason in sorted(new.get("errors", {}).items()):
+        print(f"error in new run: {name}: {reason}")
+    for name, reason in sorted(new.get("skipped", {}).items()):
+        print(f"skipped in new run: {name}: {reason}")
+
+    regressions = [r for r in rows if r["status"] == "REGRESSION"]
+    missing = [r for r in rows if r["status"] == "MISSING"]
+    print(f"\n{len(regressions)} regression(s), {len(missing)} missing metric(s)")
+    return 1 if regressions or (missing and not args.allow_missing) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
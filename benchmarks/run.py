@@ -0,0 +1,88 @@
+# run.py — run the benchmark suite and store the results as JSON
+#
+# Usage (from the repo root):
+#   python benchmarks/run.py                       # all cases -> benchmarks/results/<commit>.json
+#   python benchmarks/run.py --only cnn_keras rag --repeats 50
+#   python benchmarks/compare.py <old commit or file> <new commit or file>
+#
+# Cases whose dependencies are not installed are recorded as skipped, not failed.
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cases import CASE_CONFIG, CASES, ROOT, Skip  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the repository benchmark suite.")
+    parser.add_argument("--only", nargs="*", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--out", help="output JSON (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    logging.basicConfig(level=logging.WARNING)
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeats": args.repeats,
+        },
+        "results": {},
+        "skipped": {},
+        "errors": {},
+    }
+
+    for name in args.only or CASES:
+        print(f"[{name}] ...", flush=True)
+        start = time.perf_counter()
+        try:
+            metrics = CASES[name](args.repeats)
+        except Skip as e:
+            report["skipped"][name] = str(e)
+            print(f"[{name}] skipped: {e}")
+            continue
+        except Exception as e:
+            report["errors"][name] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+            continue
+        for metric, (value, unit, better) in metrics.items():
+            report["results"][f"{name}.{metric}"] = {"value": round(value, 4), "unit": unit, "better": better}
+            print(f"[{name}] {metric}: {value:.3f} {unit}")
+        print(f"[{name}] done in {time.perf_counter() - start:.1f}s")
+
+    report["meta"]["case_config"] = CASE_CONFIG
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {out}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
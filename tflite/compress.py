@@ -0,0 +1,314 @@
+# compress.py — shrink fruits_cnn.h5 by structured pruning or knowledge distillation
+#
+# Usage (from the repo root or from tflite/):
+#   python tflite/compress.py --prune 0.25 0.5 0.75 --distill 32 16 8
+#
+# For every compression level the script fine-tunes on fruits/train, exports a
+# Keras (.h5) and a TFLite (.tflite) artifact to compressed/ and writes a report
+# (params, FLOPs, CPU latency, accuracy) to compressed/report.json + report.md.
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Config
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(HERE, "fruits_cnn.h5")
+DATA_DIR = os.path.join(HERE, "..", "fruits")
+OUTPUT_DIR = os.path.join(HERE, "compressed")
+IMG_SIZE = (32, 32)
+BATCH_SIZE = 32
+
+
+# ---------- DATA ----------
+
+def load_split(name: str, shuffle: bool = True):
+    """Same pipeline as the training notebook: raw 0-255 RGB, the model rescales itself."""
+    return tf.keras.utils.image_dataset_from_directory(
+        os.path.join(DATA_DIR, name),
+        image_size=IMG_SIZE,
+        batch_size=BATCH_SIZE,
+        shuffle=shuffle,
+    )
+
+
+# ---------- MEASUREMENT ----------
+
+def count_params(model) -> int:
+    return int(sum(np.prod(w.shape) for w in model.weights))
+
+
+def count_flops(model) -> int:
+    """Multiply-adds x2 for Conv2D and Dense layers, the only layers that matter here."""
+    shape = (1,) + tuple(model.input_shape[1:])
+    flops = 0
+    for layer in model.layers:
+        out_shape = layer.compute_output_shape(shape)
+        if isinstance(layer, tf.keras.layers.Conv2D):
+            kh, kw = layer.kernel_size
+            flops += 2 * kh * kw * shape[-1] * out_shape[1] * out_shape[2] * out_shape[3]
+        elif isinstance(layer, tf.keras.layers.Dense):
+            flops += 2 * shape[-1] * out_shape[-1]
+        shape = out_shape
+    return int(flops)
+
+
+def keras_latency_ms(model, runs: int = 200) -> float:
+    """Median single-image CPU latency of a direct (non-.predict) model call."""
+    x = tf.constant(np.random.uniform(0, 255, (1,) + IMG_SIZE + (3,)).astype(np.float32))
+    fn = tf.function(lambda t: model(t, training=False))
+    fn(x)  # trace once
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(x).numpy()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def tflite_latency_ms(tflite_bytes: bytes, runs: int = 200) -> float:
+    interpreter = tf.lite.Interpreter(model_content=tflite_bytes, num_threads=1)
+    interpreter.allocate_tensors()
+    inp = interpreter.get_input_details()[0]
+    out = interpreter.get_output_details()[0]
+    x = np.random.uniform(0, 255, inp["shape"]).astype(inp["dtype"])
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        interpreter.set_tensor(inp["index"], x)
+        interpreter.invoke()
+        interpreter.get_tensor(out["index"])
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def tflite_accuracy(tflite_bytes: bytes, dataset) -> float:
+    interpreter = tf.lite.Interpreter(model_content=tflite_bytes)
+    inp = interpreter.get_input_details()[0]
+    out = interpreter.get_output_details()[0]
+    correct = total = 0
+    for images, labels in dataset:
+        # resize the batch dimension to whatever the dataset hands us
+        interpreter.resize_tensor_input(inp["index"], images.shape)
+        interpreter.allocate_tensors()
+        interpreter.set_tensor(inp["index"], images.numpy().astype(inp["dtype"]))
+        interpreter.invoke()
+        preds = interpreter.get_tensor(out["index"])
+        correct += int(np.sum(np.argmax(preds, axis=1) == labels.numpy()))
+        total += len(labels)
+    return correct / max(total, 1)
+
+
+def to_tflite(model, quantize: bool) -> bytes:
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize:
+        # dynamic-range quantization: int8 weights, float activations
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    return converter.convert()
+
+
+# ---------- PRUNING ----------
+
+def _l1_keep(kernel: np.ndarray, keep: int) -> np.ndarray:
+    """Indices of the `keep` output channels with the largest L1 norm, in original order."""
+    norms = np.abs(kernel.reshape(-1, kernel.shape[-1])).sum(axis=0)
+    return np.sort(np.argsort(norms)[::-1][:keep])
+
+
+def prune_model(model, ratio: float):
+    """Remove `ratio` of the filters of every Conv2D and of the units of every hidden Dense.
+
+    Filters/units are ranked by L1 magnitude. The surviving weights are copied into a
+    physically smaller model, so the savings are real on any runtime (no sparse masks).
+    The output Dense layer is never pruned.
+    """
+    last_dense = [l for l in model.layers if isinstance(l, tf.keras.layers.Dense)][-1]
+    shape = (1,) + tuple(model.input_shape[1:])
+    in_keep = np.arange(shape[-1])  # channels/features flowing into the current layer
+    new_layers, new_weights = [], []
+
+    for layer in model.layers:
+        cfg = layer.get_config()
+        weights = layer.get_weights()
+        out_shape = layer.compute_output_shape(shape)
+
+        if isinstance(layer, tf.keras.layers.Conv2D):
+            kernel, bias = weights[0][:, :, in_keep, :], weights[1]
+            out_keep = _l1_keep(kernel, max(1, int(round(kernel.shape[-1] * (1 - ratio)))))
+            cfg["filters"] = len(out_keep)
+            new_weights.append([kernel[..., out_keep], bias[out_keep]])
+            in_keep = out_keep
+        elif isinstance(layer, tf.keras.layers.Dense):
+            kernel, bias = weights[0][in_keep, :], weights[1]
+            if layer is last_dense:
+                out_keep = np.arange(kernel.shape[-1])
+            else:
+                out_keep = _l1_keep(kernel, max(1, int(round(kernel.shape[-1] * (1 - ratio)))))
+            cfg["units"] = len(out_keep)
+            new_weights.append([kernel[:, out_keep], bias[out_keep]])
+            in_keep = out_keep
+        elif isinstance(layer, tf.keras.layers.Flatten):
+            # flatten is channels-last: feature index = spatial_pos * C + channel
+            channels = shape[-1]
+            spatial = int(np.prod(shape[1:-1]))
+            in_keep = (np.arange(spatial)[:, None] * channels + in_keep[None, :]).ravel()
+            new_weights.append(weights)
+        else:
+            new_weights.append(weights)
+
+        cfg.pop("name", None)
+        new_layers.append(layer.__class__.from_config(cfg))
+        shape = out_shape
+
+    pruned = tf.keras.Sequential([tf.keras.Input(shape=model.input_shape[1:])] + new_layers)
+    for layer, weights in zip(pruned.layers, new_weights):
+        if weights:
+            layer.set_weights(weights)
+    return pruned
+
+
+# ---------- DISTILLATION ----------
+
+def build_student(width: int, hidden: int):
+    """Same topology as the notebook model, narrower."""
+    return tf.keras.Sequential([
+        tf.keras.Input(shape=IMG_SIZE + (3,)),
+        tf.keras.layers.Rescaling(1. / 255),
+        tf.keras.layers.Conv2D(width, (3, 3), activation="relu"),
+        tf.keras.layers.MaxPooling2D(),
+        tf.keras.layers.Conv2D(width, (3, 3), activation="relu"),
+        tf.keras.layers.MaxPooling2D(),
+        tf.keras.layers.Conv2D(width, (3, 3), activation="relu"),
+        tf.keras.layers.MaxPooling2D(),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(hidden, activation="relu"),
+        tf.keras.layers.Dense(3, activation="softmax"),
+    ])
+
+
+def distill(teacher, student, train_ds, epochs: int, temperature: float = 4.0, alpha: float = 0.3):
+    """Hinton-style distillation.
+
+    Both models end in softmax, so log-probabilities are used as logits (they only
+    differ by a per-sample constant, which softmax ignores).
+    loss = alpha * CE(labels, student) + (1 - alpha) * T^2 * KL(teacher_T || student_T)
+    """
+    optimizer = tf.keras.optimizers.Adam(1e-3)
+    ce = tf.keras.losses.SparseCategoricalCrossentropy()
+    kl = tf.keras.losses.KLDivergence()
+    eps = 1e-7
+
+    @tf.function
+    def train_step(images, labels):
+        teacher_logits = tf.math.log(teacher(images, training=False) + eps)
+        with tf.GradientTape() as tape:
+            student_probs = student(images, training=True)
+            student_logits = tf.math.log(student_probs + eps)
+            soft_loss = kl(tf.nn.softmax(teacher_logits / temperature),
+                           tf.nn.softmax(student_logits / temperature))
+            loss = alpha * ce(labels, student_probs) + (1 - alpha) * temperature ** 2 * soft_loss
+        grads = tape.gradient(loss, student.trainable_variables)
+        optimizer.apply_gradients(zip(grads, student.trainable_variables))
+        return loss
+
+    for epoch in range(epochs):
+        losses = [float(train_step(images, labels)) for images, labels in train_ds]
+        logger.info("distill epoch %d/%d loss=%.4f", epoch + 1, epochs, np.mean(losses))
+    student.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    return student
+
+
+def fine_tune(model, train_ds, val_ds, epochs: int):
+    model.compile(optimizer=tf.keras.optimizers.Adam(1e-4),
+                  loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    if epochs > 0:
+        model.fit(train_ds, validation_data=val_ds, epochs=epochs, verbose=2)
+    return model
+
+
+# ---------- REPORT ----------
+
+def evaluate_variant(name: str, model, test_ds, out_dir: str, quantize: bool) -> dict:
+    h5_path = os.path.join(out_dir, f"{name}.h5")
+    tflite_path = os.path.join(out_dir, f"{name}.tflite")
+    model.save(h5_path)
+    tflite_bytes = to_tflite(model, quantize)
+    with open(tflite_path, "wb") as f:
+        f.write(tflite_bytes)
+
+    _, keras_acc = model.evaluate(test_ds, verbose=0)
+    row = {
+        "variant": name,
+        "params": count_params(model),
+        "flops": count_flops(model),
+        "keras_latency_ms": round(keras_latency_ms(model), 3),
+        "tflite_latency_ms": round(tflite_latency_ms(tflite_bytes), 3),
+        "keras_accuracy": round(float(keras_acc), 4),
+        "tflite_accuracy": round(tflite_accuracy(tflite_bytes, test_ds), 4),
+        "h5_kb": round(os.path.getsize(h5_path) / 1024, 1),
+        "tflite_kb": round(len(tflite_bytes) / 1024, 1),
+        "keras_path": os.path.basename(h5_path),
+        "tflite_path": os.path.basename(tflite_path),
+    }
+    logger.info("%s", row)
+    return row
+
+
+def write_report(rows: list, out_dir: str):
+    with open(os.path.join(out_dir, "report.json"), "w") as f:
+        json.dump(rows, f, indent=2)
+
+    cols = ["variant", "params", "flops", "keras_latency_ms", "tflite_latency_ms",
+            "keras_accuracy", "tflite_accuracy", "tflite_kb"]
+    lines = ["| " + " | ".join(cols) + " |", "|" + "---|" * len(cols)]
+    for row in rows:
+        lines.append("| " + " | ".join(str(row[c]) for c in cols) + " |")
+    with open(os.path.join(out_dir, "report.md"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+    print("\n".join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune / distil the fruits CNN and report the trade-offs.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--out", default=OUTPUT_DIR)
+    parser.add_argument("--prune", type=float, nargs="*", default=[0.25, 0.5, 0.75],
+                        help="fraction of filters/units removed per layer")
+    parser.add_argument("--distill", type=int, nargs="*", default=[16, 8],
+                        help="conv width of each distilled student (Dense head = 2x width)")
+    parser.add_argument("--epochs", type=int, default=5, help="fine-tuning epochs after pruning")
+    parser.add_argument("--distill-epochs", type=int, default=15)
+    parser.add_argument("--quantize", action="store_true", help="dynamic-range quantize the TFLite exports")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    train_ds = load_split("train").cache()
+    val_ds = load_split("validation", shuffle=False).cache()
+    test_ds = load_split("test", shuffle=False).cache()
+
+    teacher = tf.keras.models.load_model(args.model)
+    teacher.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    rows = [evaluate_variant("baseline", teacher, test_ds, args.out, args.quantize)]
+
+    for ratio in args.prune:
+        logger.info("pruning %.0f%% of filters/units", ratio * 100)
+        pruned = fine_tune(prune_model(teacher, ratio), train_ds, val_ds, args.epochs)
+        rows.append(evaluate_variant(f"pruned_{int(ratio * 100)}", pruned, test_ds, args.out, args.quantize))
+
+    for width in args.distill:
+        logger.info("distilling into a %d-filter student", width)
+        student = distill(teacher, build_student(width, 2 * width), train_ds, args.distill_epochs)
+        rows.append(evaluate_variant(f"student_w{width}", student, test_ds, args.out, args.quantize))
+
+    write_report(rows, args.out)
+
+
+if __name__ == "__main__":
+    main()